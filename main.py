@@ -4,6 +4,10 @@ import sys
 import os
 import argparse
 import logging
+import multiprocessing
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List
 
 # Set the recursion limit before importing other modules
 # This is crucial for the deep recursive strategies.
@@ -11,61 +15,76 @@ sys.setrecursionlimit(10**6)
 
 # Import all necessary modules from our 'src' library
 from src import config
-from src.data_preprocessor import load_and_preprocess_data
+from src.data_preprocessor import load_and_preprocess_data, preprocess_to_period_store, trading_calendar
 from src.trading_engine import run_small_scenario, run_large_scenario
-from src.validator import validate_moves
-from src.visualizer import plot_balance_history
+from src.validator import validate_moves, validate_moves_by_period
+from src.visualizer import plot_balance_history, plot_balance_curve_async
+from src.analytics import (
+    read_moves_file, moves_to_frame, compute_move_analytics, compute_move_analytics_by_period, save_analytics
+)
 
 # Configure basic logging for the main script execution
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def main():
+# The scenarios that can be executed, in the order they are run and reported.
+SCENARIOS = ['small', 'large']
+
+# The loaded data, shared read-only with the scenario processes. Forked processes
+# inherit it without copying, so the data is loaded and preprocessed only once.
+_SHARED_DATA: Dict[str, Any] = {}
+
+
+def _compute_analytics(moves_df: pd.DataFrame, stream: bool) -> Dict[str, pd.DataFrame]:
     """
-    The main execution function of the Time-Travel Trading project.
+    Computes the analytics tables of a moves log against every cleaned row, including
+    the ones pruned from the trading data, so that any move the validator accepts is priced.
+    In streaming mode the moves are priced one month at a time from the period store.
     """
-    # 1. --- Setup and Argument Parsing ---
-    parser = argparse.ArgumentParser(
-        description="Run the Time-Travel Trading simulation."
-    )
-    parser.add_argument(
-        'scenario',
-        type=str,
-        choices=['small', 'large'],
-        help="The trading scenario to execute ('small' or 'large')."
-    )
-    args = parser.parse_args()
-    
-    logging.info(f"Starting execution for '{args.scenario.capitalize()}' scenario.")
-    
-    # 2. --- Data Loading and Preprocessing ---
-    # Ensure the results directory exists before we start.
-    os.makedirs(config.RESULTS_DIR, exist_ok=True)
-    
-    combined_data, stock_dict = load_and_preprocess_data(config.DATA_DIR)
+    if stream:
+        return compute_move_analytics_by_period(moves_df, _SHARED_DATA['trading_data'], config.INITIAL_CASH)
+    prices = pd.concat(_SHARED_DATA['stock_dict'].values(), ignore_index=True)
+    return compute_move_analytics(moves_df, prices, config.INITIAL_CASH)
+
+
+def _run_scenario(scenario: str, stream: bool, analytics: bool) -> Dict[str, Any]:
+    """
+    Runs one scenario on the shared data, then saves, visualizes and validates its moves.
+
+    Args:
+        scenario (str): The scenario to execute ('small' or 'large').
+        stream (bool): Whether the shared data is a period store instead of in-memory data.
+        analytics (bool): Whether to also compute the analytics tables.
+
+    Returns:
+        Dict[str, Any]: The scenario's summary (moves, strategy and validator cash).
+    """
+    logging.info(f"Starting execution for '{scenario.capitalize()}' scenario.")
 
-    # If data loading fails, exit gracefully.
-    if combined_data.empty:
-        logging.critical("Data preprocessing failed to produce data. Cannot continue.")
-        sys.exit(1)
-        
     # 3. --- Run Trading Scenario ---
-    if args.scenario == 'small':
-        final_cash, cash_per_year, moves = run_small_scenario(
-            df=combined_data,
-            initial_cash=config.INITIAL_CASH
+    if scenario == 'small':
+        final_cash, cash_per_year, moves, balance_per_day = run_small_scenario(
+            df=_SHARED_DATA['trading_data'],
+            initial_cash=config.INITIAL_CASH,
+            trading_dates=_SHARED_DATA.get('trading_dates')
         )
         moves_output_path = os.path.join(config.RESULTS_DIR, config.SMALL_MOVES_FILENAME)
         plot_output_path = os.path.join(config.RESULTS_DIR, config.SMALL_PLOT_FILENAME)
+        daily_plot_output_path = os.path.join(config.RESULTS_DIR, config.SMALL_DAILY_PLOT_FILENAME)
+        analytics_output_dir = os.path.join(config.RESULTS_DIR, config.SMALL_ANALYTICS_DIRNAME)
         
-    elif args.scenario == 'large':
-        final_cash, cash_per_year, moves = run_large_scenario(
-            df=combined_data,
-            initial_cash=config.INITIAL_CASH
+    elif scenario == 'large':
+        final_cash, cash_per_year, moves, balance_per_day = run_large_scenario(
+            df=_SHARED_DATA['trading_data'],
+            initial_cash=config.INITIAL_CASH,
+            trading_dates=_SHARED_DATA.get('trading_dates')
         )
         moves_output_path = os.path.join(config.RESULTS_DIR, config.LARGE_MOVES_FILENAME)
         plot_output_path = os.path.join(config.RESULTS_DIR, config.LARGE_PLOT_FILENAME)
+        daily_plot_output_path = os.path.join(config.RESULTS_DIR, config.LARGE_DAILY_PLOT_FILENAME)
+        analytics_output_dir = os.path.join(config.RESULTS_DIR, config.LARGE_ANALYTICS_DIRNAME)
 
     # 4. --- Save Results and Visualize ---
+    plot_process = None
     if not moves:
         logging.warning("The strategy produced no moves. No output files will be generated.")
     else:
@@ -80,34 +99,207 @@ def main():
             logging.error(f"Failed to save moves file: {e}")
 
         # Generate and save the balance history plot.
-        plot_balance_history(cash_per_year, plot_output_path, args.scenario)
+        plot_balance_history(cash_per_year, plot_output_path, scenario)
+
+        # Render the per-day balance plot in the background while validation runs.
+        plot_process = plot_balance_curve_async(balance_per_day, daily_plot_output_path, scenario)
+
+        # Optionally break the moves down into analytics tables.
+        if analytics:
+            tables = _compute_analytics(moves_to_frame(moves), stream)
+            save_analytics(tables, analytics_output_dir, config.ANALYTICS_FILE_FORMAT)
 
     # 5. --- Validate the Generated Moves ---
-    validated_cash = validate_moves(
-        initial_cash=config.INITIAL_CASH,
-        moves=moves,
-        stock_dict=stock_dict
+    if stream:
+        validated_cash = validate_moves_by_period(
+            initial_cash=config.INITIAL_CASH,
+            moves=moves,
+            store=_SHARED_DATA['trading_data']
+        )
+    else:
+        validated_cash = validate_moves(
+            initial_cash=config.INITIAL_CASH,
+            moves=moves,
+            stock_dict=_SHARED_DATA['stock_dict']
+        )
+
+    # Wait for the background plot before reporting.
+    if plot_process is not None:
+        plot_process.join()
+
+    return {
+        'scenario': scenario,
+        'num_moves': len(moves),
+        'final_cash': final_cash,
+        'validated_cash': validated_cash,
+    }
+
+
+def _collect_summary(scenario: str, get_summary: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Returns a scenario's summary, or a summary marking it as failed if it raised,
+    so that one failing scenario does not hide the results of the others.
+    """
+    try:
+        return get_summary()
+    except Exception as e:
+        logging.exception(f"The '{scenario.capitalize()}' scenario failed.")
+        return {'scenario': scenario, 'error': f"{type(e).__name__}: {e}"}
+
+
+def analyze(argv: List[str]):
+    """
+    Computes the analytics tables of an existing moves file, e.g.
+    `python main.py analyze results/large_moves.txt`, without re-running a scenario.
+
+    Args:
+        argv (List[str]): The command line arguments following 'analyze'.
+    """
+    parser = argparse.ArgumentParser(
+        prog="main.py analyze",
+        description="Compute the analytics tables of an existing moves file."
+    )
+    parser.add_argument(
+        'moves_path',
+        type=str,
+        help="The moves file to analyze (e.g. 'results/large_moves.txt')."
+    )
+    parser.add_argument(
+        '--output-dir',
+        type=str,
+        default=None,
+        help="The directory to write the tables into (default: 'results/analytics_<moves file name>')."
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help="Write the data to an on-disk period store and price the moves one month at a time."
     )
+    args = parser.parse_args(argv)
+
+    moves_name = os.path.splitext(os.path.basename(args.moves_path))[0]
+    output_dir = args.output_dir or os.path.join(config.RESULTS_DIR, f"analytics_{moves_name}")
+
+    moves_df = read_moves_file(args.moves_path)
+    logging.info(f"Read {len(moves_df)} moves from {args.moves_path}")
+
+    if args.stream:
+        store = preprocess_to_period_store(config.DATA_DIR, config.STORE_DIR)
+        _SHARED_DATA['trading_data'] = store
+        data_loaded = store is not None
+    else:
+        _, stock_dict = load_and_preprocess_data(config.DATA_DIR)
+        _SHARED_DATA['stock_dict'] = stock_dict
+        data_loaded = bool(stock_dict)
+
+    if not data_loaded:
+        logging.critical("Data preprocessing failed to produce data. Cannot continue.")
+        sys.exit(1)
+
+    tables = _compute_analytics(moves_df, args.stream)
+    save_analytics(tables, output_dir, config.ANALYTICS_FILE_FORMAT)
+    print(f"\nAnalytics tables saved in: '{output_dir}'")
+
+
+def main():
+    """
+    The main execution function of the Time-Travel Trading project.
+    """
+    # Analyzing an existing moves file is a separate command with its own arguments.
+    if len(sys.argv) > 1 and sys.argv[1] == 'analyze':
+        analyze(sys.argv[2:])
+        return
+
+    # 1. --- Setup and Argument Parsing ---
+    parser = argparse.ArgumentParser(
+        description="Run the Time-Travel Trading simulation."
+    )
+    parser.add_argument(
+        'scenario',
+        type=str,
+        nargs='+',
+        choices=SCENARIOS + ['all'],
+        help="The trading scenario(s) to execute ('small', 'large' or 'all')."
+    )
+    parser.add_argument(
+        '--analytics',
+        action='store_true',
+        help="Also compute per-stock, trade-type, volume-cap and monthly balance tables."
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help="Write the data to an on-disk period store and stream it one period at a time."
+    )
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if 'all' in args.scenario or s in args.scenario]
+    logging.info(f"Starting execution for scenarios: {', '.join(s.capitalize() for s in scenarios)}.")
+    
+    # 2. --- Data Loading and Preprocessing ---
+    # Ensure the results directory exists before we start.
+    os.makedirs(config.RESULTS_DIR, exist_ok=True)
+    
+    # In streaming mode, the strategies and the validator read one period at a time
+    # from the store instead of a combined in-memory DataFrame.
+    if args.stream:
+        store = preprocess_to_period_store(config.DATA_DIR, config.STORE_DIR)
+        _SHARED_DATA['trading_data'] = store
+        data_loaded = store is not None
+    else:
+        combined_data, stock_dict = load_and_preprocess_data(config.DATA_DIR)
+        _SHARED_DATA['trading_data'] = combined_data
+        _SHARED_DATA['stock_dict'] = stock_dict
+        # The calendar keeps the dates whose rows were all pruned from the trading data.
+        _SHARED_DATA['trading_dates'] = trading_calendar(stock_dict)
+        data_loaded = not combined_data.empty
+
+    # If data loading fails, exit gracefully.
+    if not data_loaded:
+        logging.critical("Data preprocessing failed to produce data. Cannot continue.")
+        sys.exit(1)
+
+    # Several scenarios run concurrently in forked processes, which share the loaded
+    # data copy-on-write. Without 'fork' (e.g. on Windows) they run one after another.
+    if len(scenarios) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(max_workers=len(scenarios), mp_context=multiprocessing.get_context('fork')) as executor:
+            futures = [executor.submit(_run_scenario, s, args.stream, args.analytics) for s in scenarios]
+            summaries = [_collect_summary(s, future.result) for s, future in zip(scenarios, futures)]
+    else:
+        summaries = [_collect_summary(s, lambda s=s: _run_scenario(s, args.stream, args.analytics)) for s in scenarios]
 
     # 6. --- Final Summary Report ---
     print("\n" + "="*50)
     print("           EXECUTION SUMMARY")
     print("="*50)
-    print(f"Scenario Executed:      {args.scenario.capitalize()}")
-    print(f"Total Moves Generated:  {len(moves)}")
-    print(f"Final Cash (Strategy):  ${final_cash:,.2f}")
-    print(f"Final Cash (Validator): ${validated_cash:,.2f}")
-    print("-"*50)
-
-    # Check if the validator's result matches the strategy's result.
-    if validated_cash != -1 and abs(final_cash - validated_cash) < 0.01:
-        print("VALIDATION STATUS: SUCCESS! The generated moves are valid.")
-    else:
-        print("VALIDATION STATUS: FAILURE! The moves are invalid or balances do not match.")
+    for summary in summaries:
+        if 'error' in summary:
+            print(f"Scenario Executed:      {summary['scenario'].capitalize()}")
+            print(f"VALIDATION STATUS: FAILED! The scenario raised an error: {summary['error']}")
+            print("-"*50)
+            continue
+
+        final_cash = summary['final_cash']
+        validated_cash = summary['validated_cash']
+
+        print(f"Scenario Executed:      {summary['scenario'].capitalize()}")
+        print(f"Total Moves Generated:  {summary['num_moves']}")
+        print(f"Final Cash (Strategy):  ${final_cash:,.2f}")
+        print(f"Final Cash (Validator): ${validated_cash:,.2f}")
+
+        # Check if the validator's result matches the strategy's result.
+        if validated_cash != -1 and abs(final_cash - validated_cash) < 0.01:
+            print("VALIDATION STATUS: SUCCESS! The generated moves are valid.")
+        else:
+            print("VALIDATION STATUS: FAILURE! The moves are invalid or balances do not match.")
+        print("-"*50)
     
     print(f"\nOutput files saved in: '{config.RESULTS_DIR}'")
     print("="*50)
 
+    if any('error' in summary for summary in summaries):
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,274 @@
+# src/analytics.py
+
+import os
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple
+
+# Import constants from the config file for cleaner calculations.
+from .config import BUY_COST_FACTOR, SELL_REVENUE_FACTOR
+from .period_store import PeriodStore
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Maps every supported action to the price column it is executed at.
+ACTION_PRICE_COLUMNS = {
+    'buy-open': 'Open',
+    'sell-high': 'High',
+    'buy-low': 'Low',
+    'sell-close': 'Close',
+}
+
+# The columns of the price data that the moves are joined with.
+PRICE_COLUMNS = ['Date', 'Stock', 'Open', 'High', 'Low', 'Close', 'Max_Quantity']
+
+# Maps the buying leg of a trade pair to a readable trade type.
+TRADE_TYPES = {
+    'buy-open': 'open-high',
+    'buy-low': 'low-close',
+}
+
+
+def read_moves_file(moves_path: str) -> pd.DataFrame:
+    """
+    Reads a moves file (a count line followed by 'date action stock quantity' lines)
+    into a DataFrame in a single vectorized parse.
+
+    Args:
+        moves_path (str): The path to the moves .txt file.
+
+    Returns:
+        pd.DataFrame: A DataFrame with the columns 'Date', 'Action', 'Stock' and 'Quantity'.
+    """
+    moves_df = pd.read_csv(
+        moves_path,
+        sep=' ',
+        skiprows=1,
+        header=None,
+        names=['Date', 'Action', 'Stock', 'Quantity'],
+        dtype={'Action': 'category', 'Stock': str, 'Quantity': np.int64},
+        # Tickers such as 'NA' or 'NULL' must not be parsed as missing values.
+        keep_default_na=False,
+    )
+    moves_df['Date'] = pd.to_datetime(moves_df['Date'], format='%Y-%m-%d')
+    return moves_df
+
+
+def moves_to_frame(moves: List[Tuple]) -> pd.DataFrame:
+    """
+    Converts an in-memory list of move tuples, as produced by the strategies,
+    into the same DataFrame layout returned by `read_moves_file`.
+
+    Args:
+        moves (List[Tuple]): A list of move tuples (date, action, stock, quantity).
+
+    Returns:
+        pd.DataFrame: A DataFrame with the columns 'Date', 'Action', 'Stock' and 'Quantity'.
+    """
+    moves_df = pd.DataFrame(moves, columns=['Date', 'Action', 'Stock', 'Quantity'])
+    moves_df['Date'] = pd.to_datetime(moves_df['Date'], format='%Y-%m-%d')
+    moves_df['Action'] = moves_df['Action'].astype('category')
+    moves_df['Quantity'] = moves_df['Quantity'].astype(np.int64)
+    return moves_df
+
+
+def price_moves(moves_df: pd.DataFrame, prices: pd.DataFrame) -> pd.DataFrame:
+    """
+    Joins a moves log with the price store and computes the cash flow of every move.
+    Every buy is paired with the sell that immediately follows it, so each pair
+    receives a common 'Trade_Id'.
+
+    Args:
+        moves_df (pd.DataFrame): The moves, as returned by `read_moves_file` or `moves_to_frame`.
+        prices (pd.DataFrame): The preprocessed stock data (e.g. the combined DataFrame).
+
+    Returns:
+        pd.DataFrame: The moves enriched with the execution price, 'Max_Quantity',
+            'Notional' (traded value before commission) and 'Cash_Flow' (signed, after commission).
+            Moves without matching price data have a NaN 'Price'.
+    """
+    priced = moves_df.merge(prices[PRICE_COLUMNS], on=['Date', 'Stock'], how='left', validate='many_to_one')
+
+    action = priced['Action'].astype(str)
+    is_buy = action.str.startswith('buy').to_numpy()
+
+    # Pick the execution price of every move with a single vectorized selection.
+    conditions = [(action == name).to_numpy() for name in ACTION_PRICE_COLUMNS]
+    choices = [priced[column].to_numpy() for column in ACTION_PRICE_COLUMNS.values()]
+    priced['Price'] = np.select(conditions, choices, default=np.nan)
+
+    priced['Notional'] = priced['Quantity'] * priced['Price']
+    priced['Cash_Flow'] = np.where(
+        is_buy,
+        -priced['Notional'] * BUY_COST_FACTOR,
+        priced['Notional'] * SELL_REVENUE_FACTOR,
+    )
+    priced['Is_Buy'] = is_buy
+    priced['Trade_Id'] = np.cumsum(is_buy) - 1
+    return priced
+
+
+def compute_move_analytics(moves_df: pd.DataFrame, prices: pd.DataFrame, initial_cash: float) -> Dict[str, pd.DataFrame]:
+    """
+    Computes per-stock, per-trade-type, volume-cap utilisation and monthly balance
+    breakdowns of a moves log with one join and a set of groupby aggregations.
+
+    Args:
+        moves_df (pd.DataFrame): The moves, as returned by `read_moves_file` or `moves_to_frame`.
+        prices (pd.DataFrame): The stock data to price the moves with. Use the full data
+            (e.g. the concatenated `stock_dict`), since moves may fall on pruned rows.
+        initial_cash (float): The starting capital the moves were generated with.
+
+    Returns:
+        Dict[str, pd.DataFrame]: A dictionary mapping table names to the analytics tables.
+    """
+    return summarize_priced_moves(price_moves(moves_df, prices), initial_cash)
+
+
+def _empty_prices() -> pd.DataFrame:
+    """Returns price data without rows, for the months missing from a store."""
+    return pd.DataFrame({
+        'Date': pd.Series(dtype='datetime64[ns]'),
+        'Stock': pd.Series(dtype=object),
+        **{column: pd.Series(dtype=float) for column in PRICE_COLUMNS[2:]},
+    })
+
+
+def compute_move_analytics_by_period(moves_df: pd.DataFrame, store: PeriodStore, initial_cash: float) -> Dict[str, pd.DataFrame]:
+    """
+    Streaming counterpart of `compute_move_analytics`. Loads the full (including
+    non-tradable) data of each month that contains moves from the store and prices
+    that month's moves against it, so only a single month is ever held in memory.
+
+    Args:
+        moves_df (pd.DataFrame): The moves in chronological order, as returned by
+            `read_moves_file` or `moves_to_frame`.
+        store (PeriodStore): The period store the moves were generated from.
+        initial_cash (float): The starting capital the moves were generated with.
+
+    Returns:
+        Dict[str, pd.DataFrame]: A dictionary mapping table names to the analytics tables.
+    """
+    priced_months = []
+    for month, month_moves in moves_df.groupby(moves_df['Date'].dt.to_period('M'), sort=False):
+        prices = store.read_month(month.year, month.month, tradable_only=False)
+        priced_months.append(price_moves(month_moves, prices if not prices.empty else _empty_prices()))
+
+    if not priced_months:
+        priced_months.append(price_moves(moves_df, _empty_prices()))
+    priced = pd.concat(priced_months, ignore_index=True)
+    # A buy and its sell share a day, so no trade spans two months and the ids can be renumbered.
+    priced['Trade_Id'] = np.cumsum(priced['Is_Buy'].to_numpy()) - 1
+    return summarize_priced_moves(priced, initial_cash)
+
+
+def summarize_priced_moves(priced: pd.DataFrame, initial_cash: float) -> Dict[str, pd.DataFrame]:
+    """
+    Builds the analytics tables from moves priced by `price_moves`. Trades with a move
+    that has no matching price data are dropped as a whole and reported, so that a
+    half-priced trade never inflates the profit, turnover or balance.
+
+    Args:
+        priced (pd.DataFrame): The priced moves, in their original order.
+        initial_cash (float): The starting capital the moves were generated with.
+
+    Returns:
+        Dict[str, pd.DataFrame]: A dictionary mapping table names to the analytics tables.
+    """
+    unpriced_ids = priced.loc[priced['Price'].isna(), 'Trade_Id'].unique()
+    if len(unpriced_ids) > 0:
+        logging.warning(f"Dropped {len(unpriced_ids)} trades with moves that have no matching price data "
+                        f"from the analytics tables.")
+        priced = priced[~priced['Trade_Id'].isin(unpriced_ids)]
+
+    # Collapse every buy/sell pair into one trade row.
+    buys = priced[priced['Is_Buy']]
+    sells = priced[~priced['Is_Buy']]
+    trades = pd.DataFrame({
+        'Date': buys['Date'].to_numpy(),
+        'Stock': buys['Stock'].to_numpy(),
+        'Trade_Type': buys['Action'].astype(str).map(TRADE_TYPES).to_numpy(),
+        'Quantity': buys['Quantity'].to_numpy(),
+        'Max_Quantity': buys['Max_Quantity'].to_numpy(),
+        'Turnover': buys['Notional'].to_numpy(),
+    }, index=buys['Trade_Id'].to_numpy())
+    trades['Turnover'] += sells.groupby('Trade_Id')['Notional'].sum().reindex(trades.index, fill_value=0.0)
+    trades['Profit'] = priced.groupby('Trade_Id')['Cash_Flow'].sum().reindex(trades.index, fill_value=0.0)
+    trades['Volume_Utilisation'] = trades['Quantity'] / trades['Max_Quantity']
+    trades['Is_Saturated'] = trades['Quantity'] >= trades['Max_Quantity']
+
+    per_stock = trades.groupby('Stock').agg(
+        Trades=('Profit', 'size'),
+        Shares=('Quantity', 'sum'),
+        Turnover=('Turnover', 'sum'),
+        Profit=('Profit', 'sum'),
+    ).sort_values('Profit', ascending=False)
+
+    per_trade_type = trades.groupby('Trade_Type').agg(
+        Trades=('Profit', 'size'),
+        Turnover=('Turnover', 'sum'),
+        Profit=('Profit', 'sum'),
+        Mean_Profit=('Profit', 'mean'),
+    )
+    per_trade_type['Share_Of_Trades'] = per_trade_type['Trades'] / per_trade_type['Trades'].sum()
+
+    volume_cap = trades.groupby(trades['Date'].dt.year.rename('Year')).agg(
+        Trades=('Volume_Utilisation', 'size'),
+        Mean_Utilisation=('Volume_Utilisation', 'mean'),
+        Median_Utilisation=('Volume_Utilisation', 'median'),
+        Saturated_Trades=('Is_Saturated', 'sum'),
+    )
+    volume_cap['Saturated_Share'] = volume_cap['Saturated_Trades'] / volume_cap['Trades']
+
+    # Every pair settles on the same day, so the month-end balance is the running sum of profits.
+    monthly = trades.groupby(trades['Date'].dt.to_period('M').rename('Month')).agg(
+        Trades=('Profit', 'size'),
+        Turnover=('Turnover', 'sum'),
+        Profit=('Profit', 'sum'),
+    )
+    monthly['Balance'] = initial_cash + monthly['Profit'].cumsum()
+    monthly.index = monthly.index.astype(str)
+
+    logging.info(f"Computed analytics for {len(trades)} trades across {len(per_stock)} stocks.")
+    return {
+        'per_stock': per_stock,
+        'per_trade_type': per_trade_type,
+        'volume_cap_utilisation': volume_cap,
+        'monthly_balance': monthly,
+    }
+
+
+def save_analytics(tables: Dict[str, pd.DataFrame], output_dir: str, file_format: str = 'parquet') -> List[str]:
+    """
+    Saves the analytics tables, one file per table. Parquet output needs the optional
+    'pyarrow' (or 'fastparquet') package; if it is missing, the tables are written as CSV.
+
+    Args:
+        tables (Dict[str, pd.DataFrame]): The tables returned by `compute_move_analytics`.
+        output_dir (str): The directory to write the tables into.
+        file_format (str): Either 'parquet' or 'csv'.
+
+    Returns:
+        List[str]: The paths of the written files.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    written: List[str] = []
+
+    for name, table in tables.items():
+        if file_format == 'parquet':
+            output_path = os.path.join(output_dir, f"{name}.parquet")
+            try:
+                table.to_parquet(output_path)
+                written.append(output_path)
+                continue
+            except ImportError:
+                logging.warning("No Parquet engine is installed. Falling back to CSV output.")
+                file_format = 'csv'
+
+        output_path = os.path.join(output_dir, f"{name}.csv")
+        table.to_csv(output_path)
+        written.append(output_path)
+
+    logging.info(f"Successfully saved {len(written)} analytics tables to {output_dir}")
+    return written
@@ -13,6 +13,9 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # Path to the directory containing the stock data .txt files.
 DATA_DIR = os.path.join(PROJECT_ROOT, 'data', 'Stocks')
 
+# Path to the directory of the date-partitioned store used by the streaming mode.
+STORE_DIR = os.path.join(PROJECT_ROOT, 'data', 'period_store')
+
 # Path to the directory where results (move files, plots) will be saved.
 RESULTS_DIR = os.path.join(PROJECT_ROOT, 'results')
 
@@ -27,6 +30,14 @@ ZERO_VALUE_THRESHOLD = 0.1
 # This is applied to the daily price range (High - Low).
 OUTLIER_STD_DEV_FACTOR = 3
 
+# In streaming mode, cleaned stocks are buffered until they reach this many rows
+# and are then written to the period store. This bounds memory during preprocessing.
+STORE_FLUSH_ROWS = 2_000_000
+
+# The file format of the period store partitions ('parquet' or 'pickle').
+# Parquet needs the optional 'pyarrow' package; pickle is used as a fallback.
+STORE_FILE_FORMAT = "parquet"
+
 
 # --- Trading Simulation Parameters ---
 
@@ -58,6 +69,21 @@ LARGE_MOVES_FILENAME = "large_moves.txt"
 SMALL_PLOT_FILENAME = "balance_small.png"
 LARGE_PLOT_FILENAME = "balance_large.png"
 
+# Filenames for the per-day balance plots of both scenarios.
+SMALL_DAILY_PLOT_FILENAME = "balance_daily_small.png"
+LARGE_DAILY_PLOT_FILENAME = "balance_daily_large.png"
+
+# The per-day balance is downsampled (LTTB) to at most this many points before plotting.
+PLOT_MAX_POINTS = 2000
+
+# Sub-directories of RESULTS_DIR for the analytics tables of both scenarios.
+SMALL_ANALYTICS_DIRNAME = "analytics_small"
+LARGE_ANALYTICS_DIRNAME = "analytics_large"
+
+# The file format of the analytics tables ('parquet' or 'csv').
+# Parquet needs the optional 'pyarrow' package; CSV is used as a fallback.
+ANALYTICS_FILE_FORMAT = "parquet"
+
 
 # --- Large Scenario Dynamic Parameters ---
 # These parameters control the behavior of the 'extra_greedy' strategy,
@@ -1,18 +1,172 @@
 # src/data_preprocessor.py
 
 import os
+import numpy as np
 import pandas as pd
 import logging
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, Optional, Iterator
 
 from .config import (
     ZERO_VALUE_THRESHOLD,
     OUTLIER_STD_DEV_FACTOR,
-    VOLUME_CONSTRAINT_FACTOR
+    VOLUME_CONSTRAINT_FACTOR,
+    BUY_COST_FACTOR,
+    SELL_REVENUE_FACTOR,
+    STORE_FLUSH_ROWS,
+    STORE_FILE_FORMAT
 )
+from .period_store import PeriodStore, reset_store, write_partitions
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def _load_stock_file(file_path: str, stock_symbol: str) -> Optional[pd.DataFrame]:
+    """
+    Loads a single stock .txt file and cleans it: skips unreliable stocks, removes
+    rows with non-positive or illogical prices and adds the derived columns.
+
+    Args:
+        file_path (str): The path to the stock .txt file.
+        stock_symbol (str): The symbol of the stock.
+
+    Returns:
+        Optional[pd.DataFrame]: The cleaned stock data, or None if the stock is skipped.
+    """
+    file = os.path.basename(file_path)
+    try:
+        if os.stat(file_path).st_size == 0:
+            logging.warning(f"File {file} is empty. Skipping.")
+            return None
+
+        df = pd.read_csv(file_path, sep=",")
+
+        # *** FIX: Convert Date to datetime object early ***
+        # This ensures both stock_dict and all_data get the correct data type.
+        df['Date'] = pd.to_datetime(df['Date'])
+        
+        zero_values_ratio = ((df[['Low', 'High', 'Open', 'Close', 'Volume']] == 0).any(axis=1).mean())
+        if zero_values_ratio > ZERO_VALUE_THRESHOLD:
+            logging.warning(f"Stock {file} has {zero_values_ratio*100:.2f}% days with zero values. Skipping.")
+            return None
+
+        df = df[
+            (df['Low'] > 0) & (df['High'] > 0) & (df['Open'] > 0) &
+            (df['Close'] > 0) & (df['Volume'] > 0)
+        ]
+        if df.empty: return None
+
+        logical_prices_mask = (df['Low'] <= df[['Open', 'Close', 'High']].min(axis=1)) & \
+                              (df['High'] >= df[['Open', 'Close', 'Low']].max(axis=1))
+        
+        num_illogical = len(df) - logical_prices_mask.sum()
+        if num_illogical > 0:
+            logging.warning(f"Stock {stock_symbol}: Removing {num_illogical} rows with illogical prices.")
+            df = df[logical_prices_mask]
+
+        if df.empty:
+            logging.warning(f"File {file} has no valid rows after filtering. Skipping.")
+            return None
+
+        # Keep only the first row of a repeated date, which is the one the validator looks up.
+        num_duplicates = df.duplicated(subset=['Date']).sum()
+        if num_duplicates > 0:
+            logging.warning(f"Stock {stock_symbol}: Removing {num_duplicates} rows with a repeated date.")
+            df = df.drop_duplicates(subset=['Date'], keep='first')
+        
+        df['Max_Quantity'] = (VOLUME_CONSTRAINT_FACTOR * df['Volume']).astype(int)
+        df['Range'] = df['High'] - df['Low']
+        df['Stock'] = stock_symbol
+        if "OpenInt" in df.columns:
+            df = df.drop(columns=["OpenInt"])
+
+        return df
+
+    except pd.errors.EmptyDataError:
+        logging.warning(f"File {file} contains no data. Skipping.")
+    except Exception as e:
+        logging.error(f"Error reading file {file}: {e}")
+    return None
+
+
+def _outlier_free_mask(df: pd.DataFrame) -> pd.Series:
+    """
+    Applies the 3-sigma rule on the daily price range (High - Low) of a single stock.
+
+    Args:
+        df (pd.DataFrame): The cleaned data of one stock.
+
+    Returns:
+        pd.Series: A boolean mask that is True for the rows that are not outliers.
+    """
+    mean_range = df['Range'].mean()
+    std_range = df['Range'].std()
+    
+    upper_threshold = mean_range + OUTLIER_STD_DEV_FACTOR * std_range
+    lower_threshold = mean_range - OUTLIER_STD_DEV_FACTOR * std_range
+    lower_threshold = max(0, lower_threshold)
+    
+    return (df['Range'] >= lower_threshold) & (df['Range'] <= upper_threshold)
+
+
+def _add_trade_margins(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Precomputes the per-share profit of both intra-day trades after commission
+    ('Margin_Open' for buy-open/sell-high, 'Margin_Low' for buy-low/sell-close) and
+    the profit of the best trade at full capacity ('Max_Profit').
+
+    Args:
+        df (pd.DataFrame): The cleaned stock data.
+
+    Returns:
+        pd.DataFrame: The data with the three columns added.
+    """
+    margin_open = df['High'] * SELL_REVENUE_FACTOR - df['Open'] * BUY_COST_FACTOR
+    margin_low = df['Close'] * SELL_REVENUE_FACTOR - df['Low'] * BUY_COST_FACTOR
+    return df.assign(
+        Margin_Open=margin_open,
+        Margin_Low=margin_low,
+        Max_Profit=df['Max_Quantity'] * np.maximum(margin_open, margin_low)
+    )
+
+
+def _candidate_mask(df: pd.DataFrame) -> pd.Series:
+    """
+    Marks the rows that can ever be traded at a profit. A row whose both trades lose
+    money after commission, or whose volume allows no shares at all, can never be
+    chosen by the strategies, whatever the available cash.
+
+    Rows that are merely dominated (another row of the same day offers a better trade)
+    are kept on purpose: once a corrective lookback has used the dominating row, the
+    next lookback falls back to the best remaining one, so pruning them would change
+    which rows the large scenario trades.
+
+    Args:
+        df (pd.DataFrame): Stock data with the columns added by `_add_trade_margins`.
+
+    Returns:
+        pd.Series: A boolean mask that is True for the trading candidates.
+    """
+    return (df['Max_Quantity'] > 0) & ((df['Margin_Open'] > 0) | (df['Margin_Low'] > 0))
+
+
+def _log_candidate_pruning(num_rows: int, num_candidates: int) -> None:
+    """
+    Logs how much of the universe was pruned from the trading candidates.
+    """
+    num_pruned = num_rows - num_candidates
+    share = num_pruned / num_rows * 100 if num_rows else 0.0
+    logging.info(f"Candidate pruning: removed {num_pruned} of {num_rows} rows ({share:.2f}%) "
+                 f"that can never be traded profitably.")
+
+
+def _iter_stock_files(data_dir: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yields the path and the upper-case symbol of every stock .txt file in `data_dir`.
+    """
+    for file in os.listdir(data_dir):
+        if file.endswith(".txt"):
+            yield os.path.join(data_dir, file), file.split('.')[0].upper()
+
+
 def load_and_preprocess_data(data_dir: str) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
     """
     Loads all stock data from .txt files, preprocesses, cleans, and combines them
@@ -26,69 +180,26 @@ def load_and_preprocess_data(data_dir: str) -> Tuple[pd.DataFrame, Dict[str, pd.
         return pd.DataFrame(), {}
 
     logging.info(f"Starting data preprocessing from directory: {data_dir}")
-    for file in os.listdir(data_dir):
-        if file.endswith(".txt"):
-            file_path = os.path.join(data_dir, file)
-            stock_symbol = file.split('.')[0].upper()
-            try:
-                if os.stat(file_path).st_size == 0:
-                    logging.warning(f"File {file} is empty. Skipping.")
-                    continue
-
-                df = pd.read_csv(file_path, sep=",")
-
-                # *** FIX: Convert Date to datetime object early ***
-                # This ensures both stock_dict and all_data get the correct data type.
-                df['Date'] = pd.to_datetime(df['Date'])
-                
-                zero_values_ratio = ((df[['Low', 'High', 'Open', 'Close', 'Volume']] == 0).any(axis=1).mean())
-                if zero_values_ratio > ZERO_VALUE_THRESHOLD:
-                    logging.warning(f"Stock {file} has {zero_values_ratio*100:.2f}% days with zero values. Skipping.")
-                    continue
-
-                df = df[
-                    (df['Low'] > 0) & (df['High'] > 0) & (df['Open'] > 0) &
-                    (df['Close'] > 0) & (df['Volume'] > 0)
-                ]
-                if df.empty: continue
-
-                logical_prices_mask = (df['Low'] <= df[['Open', 'Close', 'High']].min(axis=1)) & \
-                                      (df['High'] >= df[['Open', 'Close', 'Low']].max(axis=1))
-                
-                num_illogical = len(df) - logical_prices_mask.sum()
-                if num_illogical > 0:
-                    logging.warning(f"Stock {stock_symbol}: Removing {num_illogical} rows with illogical prices.")
-                    df = df[logical_prices_mask]
-
-                if df.empty:
-                    logging.warning(f"File {file} has no valid rows after filtering. Skipping.")
-                    continue
-                
-                df['Max_Quantity'] = (VOLUME_CONSTRAINT_FACTOR * df['Volume']).astype(int)
-                df['Range'] = df['High'] - df['Low']
-                df['Stock'] = stock_symbol
-                if "OpenInt" in df.columns:
-                    df = df.drop(columns=["OpenInt"])
-
-                all_data.append(df)
-                stock_dict[stock_symbol] = df
-
-            except pd.errors.EmptyDataError:
-                logging.warning(f"File {file} contains no data. Skipping.")
-            except Exception as e:
-                logging.error(f"Error reading file {file}: {e}")
+    for file_path, stock_symbol in _iter_stock_files(data_dir):
+        df = _load_stock_file(file_path, stock_symbol)
+        if df is None:
+            continue
+
+        all_data.append(df)
+        stock_dict[stock_symbol] = df
 
     processed_data = []
+    num_rows = 0
+    num_candidates = 0
     for df in all_data:
-        mean_range = df['Range'].mean()
-        std_range = df['Range'].std()
-        
-        upper_threshold = mean_range + OUTLIER_STD_DEV_FACTOR * std_range
-        lower_threshold = mean_range - OUTLIER_STD_DEV_FACTOR * std_range
-        lower_threshold = max(0, lower_threshold)
-        
-        filtered_df = df[(df['Range'] >= lower_threshold) & (df['Range'] <= upper_threshold)]
-        processed_data.append(filtered_df)
+        filtered_df = _add_trade_margins(df[_outlier_free_mask(df)])
+
+        # Drop the never-profitable rows from the trading candidates.
+        # The validator keeps seeing them through `stock_dict`.
+        candidates_df = filtered_df[_candidate_mask(filtered_df)]
+        num_rows += len(filtered_df)
+        num_candidates += len(candidates_df)
+        processed_data.append(candidates_df)
 
     if not processed_data:
         logging.critical("No valid data found after preprocessing. Exiting.")
@@ -96,6 +207,7 @@ def load_and_preprocess_data(data_dir: str) -> Tuple[pd.DataFrame, Dict[str, pd.
 
     combined_data = pd.concat(processed_data, ignore_index=True)
     logging.info(f"Successfully loaded and filtered data for {len(processed_data)} stocks.")
+    _log_candidate_pruning(num_rows, num_candidates)
 
     # Sort the final combined DataFrame by date.
     combined_data.sort_values(by=["Date"], inplace=True, ignore_index=True)
@@ -104,4 +216,83 @@ def load_and_preprocess_data(data_dir: str) -> Tuple[pd.DataFrame, Dict[str, pd.
     
     return combined_data, stock_dict
 
-      
\ No newline at end of file
+
+def trading_calendar(stock_dict: Dict[str, pd.DataFrame]) -> pd.DatetimeIndex:
+    """
+    Returns every date on which any stock has data, including the dates whose rows
+    were all pruned from the trading data.
+
+    Args:
+        stock_dict (Dict[str, pd.DataFrame]): The per-stock data returned by `load_and_preprocess_data`.
+
+    Returns:
+        pd.DatetimeIndex: The sorted, unique trading dates.
+    """
+    dates = [df['Date'].unique() for df in stock_dict.values()]
+    return pd.DatetimeIndex(np.unique(np.concatenate(dates)) if dates else [], name='Date')
+
+
+def preprocess_to_period_store(data_dir: str, store_dir: str) -> Optional[PeriodStore]:
+    """
+    Streaming counterpart of `load_and_preprocess_data`. Cleans the stock files one at
+    a time and writes them into a month-partitioned on-disk store instead of combining
+    them in memory. Only a batch of about `STORE_FLUSH_ROWS` rows is held at once.
+
+    The 3-sigma outliers and the rows that can never be traded profitably are kept in
+    the store with 'Tradable' set to False, so the validator still sees every row while
+    the strategies do not.
+
+    Args:
+        data_dir (str): The directory with the stock .txt files.
+        store_dir (str): The directory to write the store into. It is cleared first.
+
+    Returns:
+        Optional[PeriodStore]: The written store, or None if no valid data was found.
+    """
+    if not os.path.isdir(data_dir):
+        logging.error(f"Data directory not found: {data_dir}")
+        return None
+
+    logging.info(f"Starting streaming preprocessing from {data_dir} into {store_dir}")
+    reset_store(store_dir)
+
+    batch: List[pd.DataFrame] = []
+    batch_rows = 0
+    num_batches = 0
+    num_stocks = 0
+    num_rows = 0
+    num_candidates = 0
+    file_format = STORE_FILE_FORMAT
+
+    for file_path, stock_symbol in _iter_stock_files(data_dir):
+        df = _load_stock_file(file_path, stock_symbol)
+        if df is None:
+            continue
+
+        outlier_free = _outlier_free_mask(df)
+        df = _add_trade_margins(df)
+        candidates = _candidate_mask(df)
+        df = df.assign(Tradable=outlier_free & candidates)
+        num_rows += int(outlier_free.sum())
+        num_candidates += int(df['Tradable'].sum())
+
+        batch.append(df)
+        batch_rows += len(df)
+        num_stocks += 1
+
+        if batch_rows >= STORE_FLUSH_ROWS:
+            file_format = write_partitions(pd.concat(batch, ignore_index=True), store_dir, num_batches, file_format)
+            num_batches += 1
+            batch, batch_rows = [], 0
+
+    if batch:
+        write_partitions(pd.concat(batch, ignore_index=True), store_dir, num_batches, file_format)
+
+    if num_stocks == 0:
+        logging.critical("No valid data found after preprocessing. Exiting.")
+        return None
+
+    store = PeriodStore(store_dir)
+    logging.info(f"Successfully wrote data for {num_stocks} stocks into {len(store.partitions)} monthly partitions.")
+    _log_candidate_pruning(num_rows, num_candidates)
+    return store
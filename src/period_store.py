@@ -0,0 +1,158 @@
+# src/period_store.py
+
+import os
+import shutil
+import logging
+import numpy as np
+import pandas as pd
+from typing import Iterator, List, Optional, Tuple, Union
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Name format of the partition directories, one per calendar month (e.g. '1962-07').
+PARTITION_FORMAT = "%Y-%m"
+
+# File extensions of the supported partition file formats.
+_EXTENSIONS = {'parquet': '.parquet', 'pickle': '.pkl'}
+
+
+def reset_store(store_dir: str) -> None:
+    """
+    Removes a previously written store and creates an empty one in its place.
+
+    Args:
+        store_dir (str): The root directory of the store.
+    """
+    if os.path.isdir(store_dir):
+        shutil.rmtree(store_dir)
+    os.makedirs(store_dir)
+
+
+def write_partitions(df: pd.DataFrame, store_dir: str, part_id: int, file_format: str = 'parquet') -> str:
+    """
+    Splits a batch of cleaned stock data by month and writes one part file per month.
+    Parquet needs the optional 'pyarrow' (or 'fastparquet') package; if it is missing,
+    the parts are written as pickle files instead.
+
+    Args:
+        df (pd.DataFrame): A batch of cleaned stock data, containing any dates.
+        store_dir (str): The root directory of the store.
+        part_id (int): A number unique to this batch, used to name its part files.
+        file_format (str): Either 'parquet' or 'pickle'.
+
+    Returns:
+        str: The file format that was actually used, to be reused for later batches.
+    """
+    for partition, partition_df in df.groupby(df['Date'].dt.strftime(PARTITION_FORMAT), sort=False):
+        partition_dir = os.path.join(store_dir, partition)
+        os.makedirs(partition_dir, exist_ok=True)
+        part_path = os.path.join(partition_dir, f"part-{part_id:05d}")
+
+        if file_format == 'parquet':
+            try:
+                partition_df.to_parquet(part_path + _EXTENSIONS['parquet'], index=False)
+                continue
+            except ImportError:
+                logging.warning("No Parquet engine is installed. Falling back to pickle partitions.")
+                file_format = 'pickle'
+
+        partition_df.to_pickle(part_path + _EXTENSIONS['pickle'])
+
+    return file_format
+
+
+class PeriodStore:
+    """
+    A date-partitioned on-disk store of the cleaned stock data, written by
+    `data_preprocessor.preprocess_to_period_store`. It serves the data one year or
+    one month at a time, so only a single period is ever held in memory.
+
+    Every row carries a boolean 'Tradable' column, which is False for the rows that
+    only the validator may see (e.g. the 3-sigma outliers).
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self.partitions: List[str] = sorted(
+            name for name in os.listdir(store_dir)
+            if os.path.isdir(os.path.join(store_dir, name))
+        )
+
+    @property
+    def years(self) -> List[int]:
+        """The sorted list of years present in the store."""
+        return sorted({int(partition[:4]) for partition in self.partitions})
+
+    def _read_partition(self, partition: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        partition_dir = os.path.join(self.store_dir, partition)
+        parts = []
+        for file in sorted(os.listdir(partition_dir)):
+            part_path = os.path.join(partition_dir, file)
+            if file.endswith(_EXTENSIONS['parquet']):
+                parts.append(pd.read_parquet(part_path, columns=columns))
+            elif file.endswith(_EXTENSIONS['pickle']):
+                part_df = pd.read_pickle(part_path)
+                parts.append(part_df if columns is None else part_df[columns])
+        return pd.concat(parts, ignore_index=True)
+
+    def trading_dates(self) -> pd.DatetimeIndex:
+        """
+        Returns every date with data in the store, including the dates whose rows are
+        all non-tradable. Only the 'Date' column is read, one partition at a time.
+        """
+        dates = [self._read_partition(p, columns=['Date'])['Date'].unique() for p in self.partitions]
+        return pd.DatetimeIndex(np.unique(np.concatenate(dates)) if dates else [], name='Date')
+
+    def read_month(self, year: int, month: int, tradable_only: bool = True) -> pd.DataFrame:
+        """
+        Reads the data of a single month, sorted by date.
+
+        Args:
+            year (int): The year of the month.
+            month (int): The month (1-12).
+            tradable_only (bool): Whether to drop the rows that are not tradable.
+
+        Returns:
+            pd.DataFrame: The month's data, empty if the store has no such partition.
+        """
+        partition = f"{year:04d}-{month:02d}"
+        if partition not in self.partitions:
+            return pd.DataFrame()
+        return self._prepare(self._read_partition(partition), tradable_only)
+
+    def _prepare(self, period_df: pd.DataFrame, tradable_only: bool) -> pd.DataFrame:
+        """Optionally drops the non-tradable rows and sorts the period by date."""
+        if tradable_only:
+            period_df = period_df[period_df['Tradable']]
+        period_df = period_df.drop(columns=['Tradable'])
+        return period_df.sort_values(by=['Date', 'Stock'], kind='stable', ignore_index=True)
+
+    def iter_periods(self, freq: str = 'month', tradable_only: bool = True
+                     ) -> Iterator[Tuple[Union[int, Tuple[int, int]], pd.DataFrame]]:
+        """
+        Yields the data of every period in chronological order, sorted by date.
+
+        Args:
+            freq (str): Either 'year' (keys are years) or 'month' (keys are (year, month) tuples).
+            tradable_only (bool): Whether to drop the rows that are not tradable.
+
+        Yields:
+            Tuple[Union[int, Tuple[int, int]], pd.DataFrame]: The period key and its data.
+        """
+        if freq not in ('year', 'month'):
+            raise ValueError(f"Unsupported period frequency: '{freq}'")
+
+        groups: List[Tuple[Union[int, Tuple[int, int]], List[str]]] = []
+        for partition in self.partitions:
+            year, month = int(partition[:4]), int(partition[5:7])
+            key = year if freq == 'year' else (year, month)
+            if groups and groups[-1][0] == key:
+                groups[-1][1].append(partition)
+            else:
+                groups.append((key, [partition]))
+
+        for key, partitions in groups:
+            period_df = pd.concat([self._read_partition(p) for p in partitions], ignore_index=True)
+            period_df = self._prepare(period_df, tradable_only)
+            if not period_df.empty:
+                yield key, period_df
@@ -2,13 +2,117 @@
 
 import pandas as pd
 import numpy as np
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Optional, Dict
 
 # Import constants from the config file for cleaner calculations.
 from .config import BUY_COST_FACTOR, SELL_REVENUE_FACTOR
 
 
-def greedy_trading_recursive(df: pd.DataFrame, cash: float, moves: Optional[List[Tuple]] = None) -> Tuple[float, List[Tuple]]:
+# Relative slack on the cash-based bound, absorbing floating point rounding in `cash // price`.
+_BOUND_TOLERANCE = 1e-9
+
+
+def compute_daily_bounds(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregates, in one pass, the quantities that bound the profit of any trade on a date.
+    It only needs to run once over the whole data (or once per loaded period).
+
+    Args:
+        df (pd.DataFrame): A DataFrame with historical stock data and precomputed margins.
+
+    Returns:
+        pd.DataFrame: Indexed by sorted date, with the columns:
+            - 'max_profit': the largest saturated profit (trading the full 'Max_Quantity').
+            - 'max_return': the largest profit per unit of cash invested.
+            - 'max_margin': the largest per-share profit.
+            - 'min_buy_cost': the cheapest cost of buying one share, commission included.
+    """
+    margin_open = df['Margin_Open'].to_numpy()
+    margin_low = df['Margin_Low'].to_numpy()
+    cost_open = df['Open'].to_numpy() * BUY_COST_FACTOR
+    cost_low = df['Low'].to_numpy() * BUY_COST_FACTOR
+
+    per_row = pd.DataFrame({
+        'max_profit': df['Max_Profit'].to_numpy(),
+        'max_return': np.maximum(margin_open / cost_open, margin_low / cost_low),
+        'max_margin': np.maximum(margin_open, margin_low),
+        'min_buy_cost': np.minimum(cost_open, cost_low),
+    })
+    return per_row.groupby(df['Date'].to_numpy(), sort=True).agg(
+        {'max_profit': 'max', 'max_return': 'max', 'max_margin': 'max', 'min_buy_cost': 'min'})
+
+
+def compute_profit_bounds(daily_bounds: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Turns the daily bounds of one period into per-prefix bounds. Entry `i` of the arrays
+    bounds any trade on the rows dated up to and including `dates[i]`, so a lookback on
+    `df[df['Date'] <= date]` can be judged without scanning it. The last entry bounds
+    the whole period.
+
+    Args:
+        daily_bounds (pd.DataFrame): The rows of `compute_daily_bounds` for the period's dates.
+
+    Returns:
+        Dict[str, np.ndarray]: The 'dates' with the running maxima (or minimum, for
+            'min_buy_cost') of the daily bounds.
+    """
+    return {
+        'dates': daily_bounds.index.to_numpy(),
+        'max_profit': np.maximum.accumulate(daily_bounds['max_profit'].to_numpy()),
+        'max_return': np.maximum.accumulate(daily_bounds['max_return'].to_numpy()),
+        'max_margin': np.maximum.accumulate(daily_bounds['max_margin'].to_numpy()),
+        'min_buy_cost': np.minimum.accumulate(daily_bounds['min_buy_cost'].to_numpy()),
+    }
+
+
+def profit_upper_bound(bounds: Dict[str, np.ndarray], idx: int, cash: float) -> float:
+    """
+    Upper bound on the profit of a single trade with the given cash, over the rows of
+    prefix `idx` of `bounds`. Only whole shares are traded, so the bound is 0 when the
+    cash cannot buy a single share of any row.
+
+    Args:
+        bounds (Dict[str, np.ndarray]): The prefix bounds from `compute_profit_bounds`.
+        idx (int): The index of the prefix.
+        cash (float): The capital available for the trade.
+
+    Returns:
+        float: An upper bound on the best achievable profit.
+    """
+    # Same expression as the strategies' `cash // (price * BUY_COST_FACTOR)`, on the cheapest share.
+    max_shares = cash // bounds['min_buy_cost'][idx]
+    if max_shares <= 0:
+        return 0.0
+    return min(bounds['max_profit'][idx],
+               max_shares * bounds['max_margin'][idx],
+               cash * bounds['max_return'][idx] * (1 + _BOUND_TOLERANCE))
+
+
+def _lookback_is_hopeless(bounds: Dict[str, np.ndarray], date, cash: float, min_profit: float) -> bool:
+    """
+    Checks whether a corrective lookback up to `date` cannot execute any trade,
+    i.e. whether its best possible profit is not positive or is below `min_profit`.
+    """
+    idx = np.searchsorted(bounds['dates'], np.datetime64(date), side='right') - 1
+    if idx < 0:
+        return True
+    upper_bound = profit_upper_bound(bounds, idx, cash)
+    return upper_bound <= 0 or upper_bound < min_profit
+
+
+def _record_trade(trade_profits: Optional[List[Tuple[str, float]]], trade_date_str: str, profit: float):
+    """
+    Records the profit of an executed trade. Profits rather than cash balances are kept,
+    because a corrective lookback trades with the paused trade's cost already reserved,
+    so its cash is not the account balance; the balance after each day is the starting
+    cash plus the running sum of the profits.
+    """
+    if trade_profits is not None:
+        trade_profits.append((trade_date_str, profit))
+
+
+def greedy_trading_recursive(df: pd.DataFrame, cash: float, moves: Optional[List[Tuple]] = None,
+                             trade_profits: Optional[List[Tuple[str, float]]] = None) -> Tuple[float, List[Tuple]]:
     """
     Implements a simple, forward-looking greedy trading strategy.
     In each recursive step, it finds the single most profitable intra-day trade
@@ -18,6 +122,8 @@ def greedy_trading_recursive(df: pd.DataFrame, cash: float, moves: Optional[List
         df (pd.DataFrame): A DataFrame with historical stock data, sorted by date.
         cash (float): The current available capital.
         moves (Optional[List[Tuple]]): The list of trades executed so far.
+        trade_profits (Optional[List[Tuple[str, float]]]): If given, the (date, profit) of every
+            executed trade is appended to it.
 
     Returns:
         Tuple[float, List[Tuple]]: A tuple containing:
@@ -33,12 +139,12 @@ def greedy_trading_recursive(df: pd.DataFrame, cash: float, moves: Optional[List
     if df.empty:
         return cash, moves
 
-    # Vectorized profit calculation.
+    # Vectorized profit calculation, using the per-share margins precomputed in preprocessing.
     quantity_open = np.minimum(df['Max_Quantity'], cash // (df['Open'] * BUY_COST_FACTOR))
-    profit_open = quantity_open * (df['High'] * SELL_REVENUE_FACTOR - df['Open'] * BUY_COST_FACTOR)
+    profit_open = quantity_open * df['Margin_Open']
 
     quantity_low = np.minimum(df['Max_Quantity'], cash // (df['Low'] * BUY_COST_FACTOR))
-    profit_low = quantity_low * (df['Close'] * SELL_REVENUE_FACTOR - df['Low'] * BUY_COST_FACTOR)
+    profit_low = quantity_low * df['Margin_Low']
 
     # Find the best move.
     max_profit_per_trade = np.maximum(profit_open, profit_low)
@@ -59,6 +165,7 @@ def greedy_trading_recursive(df: pd.DataFrame, cash: float, moves: Optional[List
         cost = quantity * row['Open'] * BUY_COST_FACTOR
         revenue = quantity * row['High'] * SELL_REVENUE_FACTOR
         cash = cash - cost + revenue
+        _record_trade(trade_profits, trade_date_str, revenue - cost)
         moves.append((trade_date_str, 'buy-open', stock_symbol, str(quantity)))
         moves.append((trade_date_str, 'sell-high', stock_symbol, str(quantity)))
     else:
@@ -66,6 +173,7 @@ def greedy_trading_recursive(df: pd.DataFrame, cash: float, moves: Optional[List
         cost = quantity * row['Low'] * BUY_COST_FACTOR
         revenue = quantity * row['Close'] * SELL_REVENUE_FACTOR
         cash = cash - cost + revenue
+        _record_trade(trade_profits, trade_date_str, revenue - cost)
         moves.append((trade_date_str, 'buy-low', stock_symbol, str(quantity)))
         moves.append((trade_date_str, 'sell-close', stock_symbol, str(quantity)))
 
@@ -73,11 +181,14 @@ def greedy_trading_recursive(df: pd.DataFrame, cash: float, moves: Optional[List
     df = df[df['Date'] > row['Date']]
 
     # Recursive call for the remaining days.
-    return greedy_trading_recursive(df, cash, moves)
+    return greedy_trading_recursive(df, cash, moves, trade_profits)
 
 
 def extra_greedy_trading_recursive(df: pd.DataFrame, cash: float, moves: Optional[List[Tuple]] = None, 
-                                     past: bool = False, max_past_pairs: float = np.inf, min_profit: float = -np.inf
+                                     past: bool = False, max_past_pairs: float = np.inf, min_profit: float = -np.inf,
+                                     bounds: Optional[Dict[str, np.ndarray]] = None,
+                                     pruning_stats: Optional[Dict[str, int]] = None,
+                                     trade_profits: Optional[List[Tuple[str, float]]] = None
                                     ) -> Tuple[float, List[Tuple]]:
     """
     Implements an advanced greedy strategy with a "lookback" mechanism,
@@ -90,6 +201,11 @@ def extra_greedy_trading_recursive(df: pd.DataFrame, cash: float, moves: Optiona
         past (bool): Flag indicating if the function is in a "lookback" (corrective) call.
         max_past_pairs (float): Max number of trade pairs to execute in a corrective lookback.
         min_profit (float): Minimum profit required for a corrective trade to be executed.
+        bounds (Optional[Dict[str, np.ndarray]]): Prefix profit bounds of the period, from
+            `compute_profit_bounds`. If given, lookbacks that cannot execute a trade are skipped.
+        pruning_stats (Optional[Dict[str, int]]): Counters of scanned and pruned lookbacks, updated in place.
+        trade_profits (Optional[List[Tuple[str, float]]]): If given, the (date, profit) of every
+            executed trade, including those of corrective lookbacks, is appended to it.
 
     Returns:
         Tuple[float, List[Tuple]]: A tuple containing:
@@ -109,12 +225,12 @@ def extra_greedy_trading_recursive(df: pd.DataFrame, cash: float, moves: Optiona
     if df.empty:
         return cash, moves
 
-    # Vectorized profit calculation.
+    # Vectorized profit calculation, using the per-share margins precomputed in preprocessing.
     quantity_open = np.minimum(df['Max_Quantity'], cash // (df['Open'] * BUY_COST_FACTOR))
-    profit_open = quantity_open * (df['High'] * SELL_REVENUE_FACTOR - df['Open'] * BUY_COST_FACTOR)
+    profit_open = quantity_open * df['Margin_Open']
 
     quantity_low = np.minimum(df['Max_Quantity'], cash // (df['Low'] * BUY_COST_FACTOR))
-    profit_low = quantity_low * (df['Close'] * SELL_REVENUE_FACTOR - df['Low'] * BUY_COST_FACTOR)
+    profit_low = quantity_low * df['Margin_Low']
     
     # Find the best move.
     max_profit_per_trade = np.maximum(profit_open, profit_low)
@@ -141,15 +257,12 @@ def extra_greedy_trading_recursive(df: pd.DataFrame, cash: float, moves: Optiona
             revenue = quantity * row['High'] * SELL_REVENUE_FACTOR
             
             # Recursively call the function for the past with available cash-cost.
-            cash, in_between_moves = extra_greedy_trading_recursive(
-                df=df[df['Date'] <= row['Date']].drop(index=best_profit_idx), 
-                cash=cash-cost, 
-                moves=[], 
-                past=True, 
-                max_past_pairs=max_past_pairs - 1, 
-                min_profit=min_profit)
+            cash, in_between_moves = _corrective_lookback(
+                df, row, best_profit_idx, cash-cost, max_past_pairs, min_profit, bounds, pruning_stats,
+                trade_profits)
             
             cash = cash + revenue
+            _record_trade(trade_profits, trade_date_str, revenue - cost)
             # The "past" moves are placed between the moves from the initial call and the move the algorithm just selected.
             moves = moves + in_between_moves
             moves.append((trade_date_str, 'buy-open', stock_symbol, str(quantity)))
@@ -158,17 +271,14 @@ def extra_greedy_trading_recursive(df: pd.DataFrame, cash: float, moves: Optiona
             quantity = int(min(row['Max_Quantity'], cash / (row['Low'] * BUY_COST_FACTOR)))
             cost = quantity * row['Low'] * BUY_COST_FACTOR
             revenue = quantity * row['Close'] * SELL_REVENUE_FACTOR
-
+            
             # Recursively call the function for the past with available cash-cost.
-            cash, in_between_moves = extra_greedy_trading_recursive(
-                df=df[df['Date'] <= row['Date']].drop(index=best_profit_idx), 
-                cash=cash-cost, 
-                moves=[],
-                past=True, 
-                max_past_pairs=max_past_pairs - 1, 
-                min_profit=min_profit)
+            cash, in_between_moves = _corrective_lookback(
+                df, row, best_profit_idx, cash-cost, max_past_pairs, min_profit, bounds, pruning_stats,
+                trade_profits)
 
             cash = cash + revenue
+            _record_trade(trade_profits, trade_date_str, revenue - cost)
             # The "past" moves are placed between the moves from the initial call and the move the algorithm just selected.
             moves = moves + in_between_moves
             moves.append((trade_date_str, 'buy-low', stock_symbol, str(quantity)))
@@ -187,9 +297,42 @@ def extra_greedy_trading_recursive(df: pd.DataFrame, cash: float, moves: Optiona
     if not past:
         return extra_greedy_trading_recursive(
             df=df, cash=cash, moves=moves, past=False, 
-            max_past_pairs=max_past_pairs, min_profit=min_profit)
+            max_past_pairs=max_past_pairs, min_profit=min_profit,
+            bounds=bounds, pruning_stats=pruning_stats, trade_profits=trade_profits)
     else:
         # The number of moves for the limit is adjusted based on the moves made in the current corrective branch.
         return extra_greedy_trading_recursive(
             df=df, cash=cash, moves=moves, past=True, 
-            max_past_pairs=(max_past_pairs - (len(moves) // 2)), min_profit=min_profit)
\ No newline at end of file
+            max_past_pairs=(max_past_pairs - (len(moves) // 2)), min_profit=min_profit,
+            bounds=bounds, pruning_stats=pruning_stats, trade_profits=trade_profits)
+
+
+def _corrective_lookback(df: pd.DataFrame, row: pd.Series, best_profit_idx: int, cash: float,
+                         max_past_pairs: float, min_profit: float,
+                         bounds: Optional[Dict[str, np.ndarray]],
+                         pruning_stats: Optional[Dict[str, int]],
+                         trade_profits: Optional[List[Tuple[str, float]]]) -> Tuple[float, List[Tuple]]:
+    """
+    Runs the corrective lookback of `extra_greedy_trading_recursive` on the data up to
+    the date of the paused trade. If the prefix bounds show that no trade there can be
+    positive and reach `min_profit`, the lookback would return immediately, so it is
+    skipped before the data is even filtered.
+    """
+    if bounds is not None and _lookback_is_hopeless(bounds, row['Date'], cash, min_profit):
+        if pruning_stats is not None:
+            pruning_stats['lookbacks_pruned'] = pruning_stats.get('lookbacks_pruned', 0) + 1
+        return cash, []
+
+    if pruning_stats is not None:
+        pruning_stats['lookbacks_scanned'] = pruning_stats.get('lookbacks_scanned', 0) + 1
+
+    return extra_greedy_trading_recursive(
+        df=df[df['Date'] <= row['Date']].drop(index=best_profit_idx),
+        cash=cash,
+        moves=[],
+        past=True,
+        max_past_pairs=max_past_pairs - 1,
+        min_profit=min_profit,
+        bounds=bounds,
+        pruning_stats=pruning_stats,
+        trade_profits=trade_profits)
\ No newline at end of file
@@ -3,56 +3,156 @@
 import pandas as pd
 import numpy as np
 import logging
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, Union, Iterator, Optional
 
 # Import the core strategies and configuration parameters
-from .strategies import greedy_trading_recursive, extra_greedy_trading_recursive
+from .strategies import (
+    greedy_trading_recursive,
+    extra_greedy_trading_recursive,
+    profit_upper_bound,
+    compute_daily_bounds,
+    compute_profit_bounds
+)
 from .config import dynamic_minimum_profit
+from .period_store import PeriodStore
 
 # Configure basic logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
-def run_small_scenario(df: pd.DataFrame, initial_cash: float) -> Tuple[float, Dict[int, float], List[Tuple]]:
+def _iter_periods(df: Union[pd.DataFrame, PeriodStore], freq: str) -> Iterator[Tuple[Union[int, Tuple[int, int]], pd.DataFrame]]:
+    """
+    Yields the data of every year ('year') or month ('month') in chronological order,
+    either from an in-memory DataFrame or streamed from a PeriodStore.
+    """
+    if isinstance(df, PeriodStore):
+        yield from df.iter_periods(freq)
+        return
+
+    dates = pd.to_datetime(df['Date'])
+    keys = [dates.dt.year] if freq == 'year' else [dates.dt.year, dates.dt.month]
+    for key, period_df in df.groupby(keys, sort=True):
+        yield (int(key[0]) if freq == 'year' else (int(key[0]), int(key[1]))), period_df
+
+
+def _trading_calendar(df: Union[pd.DataFrame, PeriodStore], trading_dates: Optional[np.ndarray]) -> pd.DatetimeIndex:
+    """
+    Returns the trading dates to report the balance on: `trading_dates` if given,
+    otherwise every date of the data (for a PeriodStore, including non-tradable rows).
+    """
+    if trading_dates is None:
+        trading_dates = df.trading_dates() if isinstance(df, PeriodStore) else pd.to_datetime(df['Date']).unique()
+    return pd.DatetimeIndex(np.unique(trading_dates), name='Date')
+
+
+def _iter_calendar_periods(df: Union[pd.DataFrame, PeriodStore], calendar: pd.DatetimeIndex, freq: str
+                           ) -> Iterator[Tuple[Union[int, Tuple[int, int]], Optional[pd.DataFrame], np.ndarray]]:
+    """
+    Yields every period of the trading calendar in chronological order with its data
+    (None if all of its rows were pruned) and its trading dates. The data is still
+    read one period at a time.
+    """
+    keys = [calendar.year] if freq == 'year' else [calendar.year, calendar.month]
+    calendar_periods = pd.Series(calendar, index=calendar).groupby(keys, sort=True)
+
+    data_periods = _iter_periods(df, freq)
+    pending = next(data_periods, None)
+    for key, dates in calendar_periods:
+        key = int(key[0]) if freq == 'year' else (int(key[0]), int(key[1]))
+
+        # Data outside the calendar is still traded, on its own dates.
+        while pending is not None and pending[0] < key:
+            yield pending[0], pending[1], pending[1]['Date'].unique()
+            pending = next(data_periods, None)
+
+        if pending is not None and pending[0] == key:
+            yield key, pending[1], np.union1d(dates.to_numpy(), pending[1]['Date'].unique())
+            pending = next(data_periods, None)
+        else:
+            yield key, None, dates.to_numpy()
+
+    while pending is not None:
+        yield pending[0], pending[1], pending[1]['Date'].unique()
+        pending = next(data_periods, None)
+
+
+def _daily_balance(trade_profits: List[Tuple[str, float]], start_cash: float, dates: np.ndarray) -> pd.Series:
+    """
+    Builds the end-of-day balance of a period on each of `dates` from the profits the
+    strategy recorded for its trades, carrying the balance over days without trades.
+    """
+    days = pd.DatetimeIndex(dates, name='Date').sort_values()
+    if not trade_profits:
+        return pd.Series(start_cash, index=days, name='Balance')
+
+    trade_dates, profits = zip(*trade_profits)
+    daily_profit = pd.Series(profits, index=pd.to_datetime(trade_dates, format='%Y-%m-%d')).groupby(level=0).sum()
+    balance = start_cash + daily_profit.cumsum()
+    return balance.reindex(days).ffill().fillna(start_cash).rename('Balance')
+
+
+def _concat_balances(balances: List[pd.Series]) -> pd.Series:
+    """
+    Joins the per-period daily balance series into one series for the whole run.
+    """
+    if not balances:
+        return pd.Series(dtype=float, index=pd.DatetimeIndex([], name='Date'), name='Balance')
+    return pd.concat(balances)
+
+
+def run_small_scenario(df: Union[pd.DataFrame, PeriodStore], initial_cash: float,
+                       trading_dates: Optional[np.ndarray] = None) -> Tuple[float, Dict[int, float], List[Tuple], pd.Series]:
     """
     Executes the 'small' scenario strategy by applying the simple greedy algorithm
     on a year-by-year basis. The cash compounds annually.
 
     Args:
-        df (pd.DataFrame): The preprocessed and sorted DataFrame with all stock data.
+        df (Union[pd.DataFrame, PeriodStore]): The preprocessed and sorted DataFrame with all
+            stock data, or a PeriodStore to stream it from one year at a time.
         initial_cash (float): The starting capital.
+        trading_dates (Optional[np.ndarray]): Every trading date, including those whose rows
+            were all pruned from `df`. The cash and balance are also reported on them.
+            Defaults to the dates of `df`.
 
     Returns:
-        Tuple[float, Dict[int, float], List[Tuple]]: A tuple containing:
+        Tuple[float, Dict[int, float], List[Tuple], pd.Series]: A tuple containing:
             - The final total cash.
             - A dictionary tracking the cash balance at the end of each year.
             - A list of all executed moves.
+            - The end-of-day balance on every trading day, indexed by date.
     """
     logging.info("Starting Small Scenario: Greedy trading by year.")
-    df['Year'] = pd.to_datetime(df['Date']).dt.year
-    years = sorted(df['Year'].unique())
 
     cash = initial_cash
     cash_per_year: Dict[int, float] = {}
     all_moves: List[Tuple] = []
+    balance_per_day: List[pd.Series] = []
 
-    for year in years:
+    # Only the data of the current year is held at a time.
+    calendar = _trading_calendar(df, trading_dates)
+    for year, yearly_data, dates in _iter_calendar_periods(df, calendar, 'year'):
         logging.info(f"Processing year: {year} with available cash: ${cash:,.2f}")
 
-        # Filter data for the specific year.
-        yearly_data = df[df['Year'] == year].copy()
+        # A year without tradable rows carries the cash over unchanged.
+        if yearly_data is None:
+            cash_per_year[year] = cash
+            balance_per_day.append(_daily_balance([], cash, dates))
+            continue
 
         # Apply the simple greedy strategy for the year.
         # Note: The original `moves` list from the previous year is not passed,
         # ensuring each year starts fresh, only carrying over the cash.
-        cash, moves = greedy_trading_recursive(yearly_data, cash, moves=[])
+        start_cash = cash
+        trade_profits: List[Tuple[str, float]] = []
+        cash, moves = greedy_trading_recursive(yearly_data, cash, moves=[], trade_profits=trade_profits)
         cash_per_year[year] = cash
+        balance_per_day.append(_daily_balance(trade_profits, start_cash, dates))
 
         # Append the moves from this year to the master list.
         all_moves.extend(moves)
     
     logging.info(f"Small Scenario finished. Final cash: ${cash:,.2f}")
-    return cash, cash_per_year, all_moves
+    return cash, cash_per_year, all_moves, _concat_balances(balance_per_day)
 
 
 def _dynamic_max_pairs(initial_max_pairs: float, current_year: int, last_year: int) -> float:
@@ -80,61 +180,106 @@ def _dynamic_max_pairs(initial_max_pairs: float, current_year: int, last_year: i
         return int(initial_max_pairs * (1 + 15000 / (remaining_years + 1)))
 
 
-def run_large_scenario(df: pd.DataFrame, initial_cash: float, initial_max_past_pairs: float = np.inf) -> Tuple[float, Dict[int, float], List[Tuple]]:
+def run_large_scenario(df: Union[pd.DataFrame, PeriodStore], initial_cash: float, initial_max_past_pairs: float = np.inf,
+                       use_profit_bounds: bool = True, trading_dates: Optional[np.ndarray] = None
+                       ) -> Tuple[float, Dict[int, float], List[Tuple], pd.Series]:
     """
     Executes the 'large' scenario strategy by applying the extra greedy algorithm
     (with lookback) on a month-by-month basis.
 
+    With `use_profit_bounds`, upper bounds on the achievable profit are precomputed
+    per date and turned into per-month and per-prefix bounds. Months in which the cash
+    cannot buy a whole share of any profitable row, and corrective lookbacks that cannot
+    make a positive profit of at least `min_profit`, are skipped without running the
+    strategy on them. The result is identical to the unpruned run.
+
     Args:
-        df (pd.DataFrame): The preprocessed and sorted DataFrame with all stock data.
+        df (Union[pd.DataFrame, PeriodStore]): The preprocessed and sorted DataFrame with all
+            stock data, or a PeriodStore to stream it from one month at a time.
         initial_cash (float): The starting capital.
         initial_max_past_pairs (float): The base number for max corrective trades.
+        use_profit_bounds (bool): Whether to prune periods and lookbacks with profit bounds.
+        trading_dates (Optional[np.ndarray]): Every trading date, including those whose rows
+            were all pruned from `df`. The cash and balance are also reported on them.
+            Defaults to the dates of `df`.
 
     Returns:
-        Tuple[float, Dict[int, float], List[Tuple]]: A tuple containing:
+        Tuple[float, Dict[int, float], List[Tuple], pd.Series]: A tuple containing:
             - The final total cash.
             - A dictionary tracking the cash balance at the end of each year.
             - A list of all executed moves.
+            - The end-of-day balance on every trading day, indexed by date.
     """
     logging.info("Starting Large Scenario: Extra greedy trading by month.")
-    df['Year'] = pd.to_datetime(df['Date']).dt.year
-    df['Month'] = pd.to_datetime(df['Date']).dt.month
-    
-    years = sorted(df['Year'].unique())
-    max_year = max(years)
-    months = sorted(df['Month'].unique())
+    calendar = _trading_calendar(df, trading_dates)
+    max_year = int(calendar.year.max())
+
+    # The daily bounds of in-memory data are precomputed in a single pass over all of it.
+    # A PeriodStore never holds all the data, so its bounds are computed as each month is loaded.
+    daily_bounds = compute_daily_bounds(df) if use_profit_bounds and isinstance(df, pd.DataFrame) else None
+    pruning_stats: Dict[str, int] = {'periods_pruned': 0, 'lookbacks_pruned': 0, 'lookbacks_scanned': 0}
 
     cash = initial_cash
     cash_per_year: Dict[int, float] = {}
     all_moves: List[Tuple] = []
+    balance_per_day: List[pd.Series] = []
 
-    for year in years:
-        logging.info(f"Processing year: {year} with available cash: ${cash:,.2f}")
-        for month in months:
-            # Filter data for the specific month and year.
-            monthly_data = df[(df['Year'] == year) & (df['Month'] == month)].copy()
-            if monthly_data.empty:
+    # Only the data of the current month is held at a time.
+    for (year, month), monthly_data, dates in _iter_calendar_periods(df, calendar, 'month'):
+        if year not in cash_per_year:
+            logging.info(f"Processing year: {year} with available cash: ${cash:,.2f}")
+
+        # A month without tradable rows carries the cash over unchanged.
+        if monthly_data is None:
+            cash_per_year[year] = cash
+            balance_per_day.append(_daily_balance([], cash, dates))
+            continue
+
+        bounds = None
+        if use_profit_bounds:
+            if daily_bounds is not None:
+                monthly_bounds = daily_bounds.loc[f"{year}-{month:02d}"]
+            else:
+                monthly_bounds = compute_daily_bounds(monthly_data)
+            bounds = compute_profit_bounds(monthly_bounds)
+
+            # The bound of the last date prefix covers the whole month: skip the month without
+            # running the strategy on it if the cash cannot buy a share of any profitable trade.
+            if profit_upper_bound(bounds, -1, cash) <= 0:
+                pruning_stats['periods_pruned'] += 1
+                cash_per_year[year] = cash
+                balance_per_day.append(_daily_balance([], cash, dates))
                 continue
-            
-            # Get the dynamic parameters for the strategy call.
-            max_past_pairs = _dynamic_max_pairs(initial_max_past_pairs, year, max_year)
-            min_profit = dynamic_minimum_profit(cash)
-
-            # Apply the extra greedy strategy for the month.
-            cash, moves = extra_greedy_trading_recursive(
-                df=monthly_data,
-                cash=cash,
-                moves=[],
-                past=False,
-                max_past_pairs=max_past_pairs,
-                min_profit=min_profit
-            )
-            
-            # Append the moves from this month to the master list.
-            all_moves.extend(moves)
+
+        # Get the dynamic parameters for the strategy call.
+        max_past_pairs = _dynamic_max_pairs(initial_max_past_pairs, year, max_year)
+        min_profit = dynamic_minimum_profit(cash)
+
+        # Apply the extra greedy strategy for the month.
+        start_cash = cash
+        trade_profits: List[Tuple[str, float]] = []
+        cash, moves = extra_greedy_trading_recursive(
+            df=monthly_data,
+            cash=cash,
+            moves=[],
+            past=False,
+            max_past_pairs=max_past_pairs,
+            min_profit=min_profit,
+            bounds=bounds,
+            pruning_stats=pruning_stats,
+            trade_profits=trade_profits
+        )
         
-        # Record the cash at the end of the year.
-        cash_per_year[year] = cash
+        # Append the moves from this month to the master list.
+        all_moves.extend(moves)
+        balance_per_day.append(_daily_balance(trade_profits, start_cash, dates))
     
+        # Record the cash at the end of the year (overwritten until its last month).
+        cash_per_year[year] = cash
+
+    if use_profit_bounds:
+        logging.info(f"Profit bound pruning: skipped {pruning_stats['periods_pruned']} months and "
+                     f"{pruning_stats['lookbacks_pruned']} of "
+                     f"{pruning_stats['lookbacks_pruned'] + pruning_stats['lookbacks_scanned']} lookbacks.")
     logging.info(f"Large Scenario finished. Final cash: ${cash:,.2f}")
-    return cash, cash_per_year, all_moves
\ No newline at end of file
+    return cash, cash_per_year, all_moves, _concat_balances(balance_per_day)
\ No newline at end of file
@@ -7,6 +7,7 @@ import logging
 
 # Import constants from config
 from .config import BUY_COST_FACTOR, SELL_REVENUE_FACTOR
+from .period_store import PeriodStore
 
 def validate_moves(
     initial_cash: float,
@@ -30,7 +31,73 @@ def validate_moves(
         float: The final cash balance after all moves. Returns -1.0 if validation fails.
     """
     logging.info("Starting move validation...")
-    
+    final_balance = _replay_moves(initial_cash, moves, stock_dict)
+    if final_balance != -1.0:
+        logging.info(f"Move validation complete. Final calculated balance: ${final_balance:,.2f}")
+    return final_balance
+
+
+def validate_moves_by_period(
+    initial_cash: float,
+    moves: List[Tuple[str, str, str, str]],
+    store: PeriodStore
+) -> float:
+    """
+    Streaming counterpart of `validate_moves`. Loads the full (including non-tradable)
+    data of each month that contains moves from the store and validates that month's
+    moves against it, carrying the balance over to the next month.
+
+    Args:
+        initial_cash (float): The starting cash amount.
+        moves (List[Tuple[str, str, str, str]]): A list of move tuples (date, action, stock, quantity).
+        store (PeriodStore): The period store the moves were generated from.
+
+    Returns:
+        float: The final cash balance after all moves. Returns -1.0 if validation fails.
+    """
+    logging.info("Starting move validation by period...")
+
+    # Split the moves into runs of consecutive moves in the same month.
+    runs: Dict[Tuple[int, int], Tuple[int, int]] = {}
+    start = 0
+    for i in range(1, len(moves) + 1):
+        if i == len(moves) or moves[i][0][:7] != moves[start][0][:7]:
+            try:
+                key = (int(moves[start][0][:4]), int(moves[start][0][5:7]))
+            except ValueError:
+                logging.error(f"Invalid data format in move: {moves[start]}. Validation failed.")
+                return -1.0
+            if runs and key <= last_key:
+                logging.error(f"Inconsistent move dates around {moves[start]}. Moves are not chronological.")
+                return -1.0
+            runs[key] = (start, i)
+            last_key, start = key, i
+
+    # Only the months that contain moves are read from the store.
+    balance = initial_cash
+    for (year, month), (start, end) in runs.items():
+        monthly_data = store.read_month(year, month, tradable_only=False)
+        if monthly_data.empty:
+            logging.error(f"No data found for the moves of {year}-{month:02d}. Validation failed.")
+            return -1.0
+        stock_dict = {stock: stock_df for stock, stock_df in monthly_data.groupby('Stock')}
+        balance = _replay_moves(balance, moves[start:end], stock_dict)
+        if balance == -1.0:
+            return -1.0
+
+    logging.info(f"Move validation complete. Final calculated balance: ${balance:,.2f}")
+    return balance
+
+
+def _replay_moves(
+    initial_cash: float,
+    moves: List[Tuple[str, str, str, str]],
+    stock_dict: Dict[str, pd.DataFrame]
+) -> float:
+    """
+    Replays the moves against the stock data, checking every constraint.
+    Returns the final balance, or -1.0 on the first violation.
+    """
     current_date = None
     daily_cash = 0.0
     daily_revenue = 0.0
@@ -101,6 +168,4 @@ def validate_moves(
         else:
             logging.warning(f"Unsupported action '{action}' in move: {move}")
 
-    final_balance = daily_cash + daily_revenue
-    logging.info(f"Move validation complete. Final calculated balance: ${final_balance:,.2f}")
-    return final_balance
\ No newline at end of file
+    return daily_cash + daily_revenue
\ No newline at end of file
@@ -1,9 +1,27 @@
 # src/visualizer.py
 
 import os
-import matplotlib.pyplot as plt
-from typing import Dict
 import logging
+import multiprocessing
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from typing import Dict, Tuple
+
+from .config import PLOT_MAX_POINTS
+
+def _save_figure(fig: Figure, output_path: str):
+    """
+    Renders a figure through the Agg canvas and saves it, without touching pyplot's global state.
+    """
+    FigureCanvasAgg(fig)
+    try:
+        fig.savefig(output_path)
+        logging.info(f"Successfully saved plot to {output_path}")
+    except Exception as e:
+        logging.error(f"Failed to save plot to {output_path}: {e}")
+
 
 def plot_balance_history(cash_per_year: Dict[int, float], output_path: str, scenario_name: str):
     """
@@ -21,28 +39,133 @@ def plot_balance_history(cash_per_year: Dict[int, float], output_path: str, scen
     years = list(cash_per_year.keys())
     balances = list(cash_per_year.values())
 
-    plt.figure(figsize=(12, 7))
-    plt.plot(years, balances, color='darkred', marker='o', linestyle='-', markersize=4)
-    plt.fill_between(years, balances, color='darkred', alpha=0.3)
+    fig = Figure(figsize=(12, 7))
+    ax = fig.add_subplot()
+    ax.plot(years, balances, color='darkred', marker='o', linestyle='-', markersize=4)
+    ax.fill_between(years, balances, color='darkred', alpha=0.3)
 
     # Set ticks for every 2 years for better readability.
     start_year = min(years) if years else 1962
     end_year = max(years) if years else 2018
     ticks = range(start_year, end_year + 1, 2)
-    plt.xticks(ticks, rotation=45)
+    ax.set_xticks(ticks)
+    ax.tick_params(axis='x', labelrotation=45)
 
     # Use logarithmic scale for the y-axis to handle large growth.
-    plt.yscale('log')
-    plt.xlabel('Year')
-    plt.ylabel('Balance (Log Scale)')
-    plt.title(f'Balance Over Years - {scenario_name.capitalize()} Scenario')
-    plt.grid(True, which='both', linestyle='--', linewidth=0.5)
-    plt.tight_layout()
+    ax.set_yscale('log')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Balance (Log Scale)')
+    ax.set_title(f'Balance Over Years - {scenario_name.capitalize()} Scenario')
+    ax.grid(True, which='both', linestyle='--', linewidth=0.5)
+    fig.tight_layout()
 
-    try:
-        plt.savefig(output_path)
-        logging.info(f"Successfully saved plot to {output_path}")
-    except Exception as e:
-        logging.error(f"Failed to save plot to {output_path}: {e}")
-    
-    plt.close() # Close the plot to free up memory.
\ No newline at end of file
+    _save_figure(fig, output_path)
+
+
+def lttb_downsample(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Selects `n_out` points of a series with the Largest-Triangle-Three-Buckets algorithm.
+    The points are split into buckets and, from each, the point forming the largest
+    triangle with the previously selected point and the next bucket's average is kept,
+    which preserves the peaks and troughs that give the curve its shape.
+
+    Args:
+        x (np.ndarray): The x values, in increasing order.
+        y (np.ndarray): The y values.
+        n_out (int): The number of points to keep.
+
+    Returns:
+        np.ndarray: The sorted indices of the selected points, always including the first and last.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # The first and last points are always kept; the rest are split into n_out - 2 buckets.
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start = edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return selected
+
+
+def _downsample_balance(balance: pd.Series, max_points: int) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+    """
+    Downsamples a balance series with LTTB on the log of the balance, matching the log-scale plot.
+    """
+    x = balance.index.asi8.astype(float)
+    y = balance.to_numpy(dtype=float)
+    selected = lttb_downsample(x, np.log10(np.maximum(y, np.finfo(float).tiny)), max_points)
+    return balance.index[selected], y[selected]
+
+
+def plot_balance_curve(balance: pd.Series, output_path: str, scenario_name: str, max_points: int = PLOT_MAX_POINTS):
+    """
+    Generates and saves a high-resolution plot of the balance, e.g. the per-day balance
+    of the large scenario. The series is downsampled to at most `max_points` points
+    with LTTB before rendering, so millions of points plot quickly.
+
+    Args:
+        balance (pd.Series): The balance, indexed by date.
+        output_path (str): The full path (including filename) to save the plot image.
+        scenario_name (str): The name of the scenario (e.g., "Small", "Large") for the plot title.
+        max_points (int): The maximum number of points to draw.
+    """
+    if balance.empty:
+        logging.warning("Balance series is empty. Skipping plot generation.")
+        return
+
+    dates, balances = _downsample_balance(balance.sort_index(), max_points)
+
+    fig = Figure(figsize=(12, 7))
+    ax = fig.add_subplot()
+    ax.plot(dates, balances, color='darkred', linestyle='-', linewidth=1)
+    ax.fill_between(dates, balances, color='darkred', alpha=0.3)
+
+    # Use logarithmic scale for the y-axis to handle large growth.
+    ax.set_yscale('log')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Balance (Log Scale)')
+    ax.set_title(f'Daily Balance - {scenario_name.capitalize()} Scenario '
+                 f'({len(balances):,} of {len(balance):,} points)')
+    ax.grid(True, which='both', linestyle='--', linewidth=0.5)
+    fig.autofmt_xdate()
+    fig.tight_layout()
+
+    _save_figure(fig, output_path)
+
+
+def plot_balance_curve_async(balance: pd.Series, output_path: str, scenario_name: str,
+                             max_points: int = PLOT_MAX_POINTS) -> multiprocessing.Process:
+    """
+    Runs `plot_balance_curve` in a background process, so rendering does not block the run.
+    The caller should `join()` the returned process before exiting.
+
+    Args:
+        balance (pd.Series): The balance, indexed by date.
+        output_path (str): The full path (including filename) to save the plot image.
+        scenario_name (str): The name of the scenario (e.g., "Small", "Large") for the plot title.
+        max_points (int): The maximum number of points to draw.
+
+    Returns:
+        multiprocessing.Process: The started plotting process.
+    """
+    process = multiprocessing.Process(
+        target=plot_balance_curve,
+        args=(balance, output_path, scenario_name, max_points),
+        name=f"plot-{os.path.basename(output_path)}"
+    )
+    process.start()
+    return process